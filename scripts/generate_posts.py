@@ -14,32 +14,29 @@ import re
 import json
 import glob
 import logging
+from operator import attrgetter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from scripts.utils import (
     logger, login, get_repo, get_me, is_me, format_time,
     get_content_word_count, get_content_image_count,
     POSTS_DIR, POSTS_INDEX_FILE, POSTS_EXPORT_FILE,
     IGNORE_LABELS, METADATA_FILE, load_metadata, save_metadata,
-    log_environment
+    log_environment, fetch_repo_data
 )
 
-
-def get_repo_labels(repo):
-    """获取仓库所有标签"""
-    try:
-        return list(repo.get_labels())
-    except Exception as e:
-        logger.error(f"获取仓库标签失败: {str(e)}")
-        return []
-
-
-def get_issues_from_label(repo, label):
-    """获取特定标签的issue"""
-    try:
-        return repo.get_issues(labels=(label,))
-    except Exception as e:
-        logger.error(f"获取标签issue失败: {str(e)}")
-        return []
+# 并发生成 issue 的线程数（GitHub 对同一 token 的并发请求有二级限流）
+SAVE_ISSUE_WORKERS = 8
+# 写 .md 文件的缓冲区大小，整篇内容一次落盘
+WRITE_BUFFER_SIZE = 1 << 20
+# 文件名中的路径分隔符换成 -，空格换成 .
+FILENAME_TRANSLATION = str.maketrans({'/': '-', '\\': '-', ' ': '.'})
+# 去掉字母数字（含中文等 Unicode 字符）和 . - _ 以外的字符，\w 与 str.isalnum() 加下划线等价
+FILENAME_UNSAFE_RE = re.compile(r'[^\w.\-]')
+# 首行一级标题（评论分段标题、索引标题）
+H1_TITLE_RE = re.compile(r'^#\s+(.+?)(?:\n|$)')
+# 行首 1~6 级标题标记，用于整体降级
+HEADING_RE = re.compile(r'^(#{1,6})(?=\s)', re.MULTILINE)
 
 
 def get_to_generate_issues(repo, me, issue_number=None):
@@ -54,7 +51,9 @@ def get_to_generate_issues(repo, me, issue_number=None):
                 return []
 
         logger.info("未指定issue_number，将处理所有issue")
-        return list(repo.get_issues())
+        # 只拉取未关闭的 issue/PR，已关闭的与历史 PR 不必下载
+        issues, _ = fetch_repo_data(repo, me, state="open")
+        return issues
     except Exception as e:
         logger.error(f"获取待生成的issues失败: {str(e)}")
         return []
@@ -62,9 +61,8 @@ def get_to_generate_issues(repo, me, issue_number=None):
 
 def sanitize_filename(title):
     """将标题转换为安全的文件名"""
-    safe = title.replace('/', '-').replace('\\', '-').replace(' ', '.')
-    safe = ''.join(c for c in safe if c.isalnum() or c in '.-_')
-    return safe
+    safe = title.translate(FILENAME_TRANSLATION)
+    return FILENAME_UNSAFE_RE.sub('', safe)
 
 
 def get_label_dir(issue):
@@ -79,7 +77,7 @@ def _extract_comment_title_and_body(comment, me):
     body = comment.body or "*(无内容)*"
 
     # 尝试提取评论首行的一级标题作为分段标题
-    h1_match = re.match(r'^#\s+(.+?)(?:\n|$)', body)
+    h1_match = H1_TITLE_RE.match(body)
     if h1_match:
         title = h1_match.group(1).strip()
         # 去掉首行标题，其余内容所有标题降一级
@@ -93,65 +91,102 @@ def _extract_comment_title_and_body(comment, me):
 
 def _downgrade_headings(text):
     """将文本中所有 # 标题降一级（# → ##, ## → ### ... ###### → #######）"""
-    return re.sub(r'^(#{1,6})(?=\s)', r'#\1', text, flags=re.MULTILINE)
+    return HEADING_RE.sub(r'#\1', text)
+
+
+def is_issue_unchanged(issue, metadata):
+    """判断 issue 自上次生成后是否未变化（updated_at 与元数据一致且 .md 文件仍在）
+    新增/编辑评论同样会刷新 issue 的 updated_at
+    """
+    info = metadata.get(str(issue.number))
+    if not info:
+        return False
+    updated = issue.updated_at.isoformat() if hasattr(issue.updated_at, 'isoformat') else str(issue.updated_at)
+    if info.get("updated") != updated:
+        return False
+    md_path = os.path.join(POSTS_DIR, info.get("label", "no-label"), f"{info.get('filename', '')}.md")
+    return os.path.exists(md_path)
+
+
+def select_issues_to_generate(issues, me, metadata, force=False):
+    """筛选需要重新生成的 issue：只保留自己的，force 为 False 时跳过未变化的"""
+    selected = []
+    for issue in issues:
+        if not is_me(issue, me):
+            logger.debug(f"跳过非自己的 issue: #{issue.number}")
+            continue
+        if not force and is_issue_unchanged(issue, metadata):
+            logger.debug(f"跳过未变化的 issue: #{issue.number}")
+            continue
+        selected.append(issue)
+    return selected
 
 
-def save_issue(issue, me):
-    """保存 issue 为 .md 文件到 posts/ 目录下"""
+def save_issue(issue, me, metadata=None):
+    """保存 issue 为 .md 文件到 posts/ 目录下
+    metadata 为调用方持有的元数据字典，提供时只更新该字典、由调用方统一落盘；
+    未提供时自行读写元数据文件
+    """
     label_dir = get_label_dir(issue)
     dir_path = os.path.join(POSTS_DIR, label_dir)
-    if not os.path.exists(dir_path):
+    # 直接创建，目录已存在（含其他线程刚创建）时由异常判断，省去单独的 exists 检查
+    try:
         os.makedirs(dir_path)
         logger.info(f"创建标签目录: {dir_path}")
+    except FileExistsError:
+        pass
 
     safe_title = sanitize_filename(issue.title)
     md_path = os.path.join(dir_path, f"{safe_title}.md")
 
     try:
-        with open(md_path, "w", encoding="utf-8") as f:
-            # 元数据注释块（机器可读，不影响渲染）
-            labels = [l.name for l in issue.labels]
-            f.write("<!--\n")
-            f.write(f"  issue_number: {issue.number}\n")
-            f.write(f"  state: {issue.state}\n")
-            f.write(f"  created_at: {issue.created_at.isoformat() if hasattr(issue.created_at, 'isoformat') else str(issue.created_at)}\n")
-            f.write(f"  updated_at: {issue.updated_at.isoformat() if hasattr(issue.updated_at, 'isoformat') else str(issue.updated_at)}\n")
-            f.write(f"  labels: [{', '.join(labels)}]\n")
-            f.write(f"  url: {issue.html_url}\n")
-            f.write("-->\n\n")
-
+        # 评论在拼装内容前一次取齐；issue 自带的评论数为 0 时无需请求评论列表
+        comments = list(issue.get_comments()) if issue.comments else []
+
+        # 元数据注释块（机器可读，不影响渲染）
+        labels = [l.name for l in issue.labels]
+        parts = [
+            "<!--\n",
+            f"  issue_number: {issue.number}\n",
+            f"  state: {issue.state}\n",
+            f"  created_at: {issue.created_at.isoformat() if hasattr(issue.created_at, 'isoformat') else str(issue.created_at)}\n",
+            f"  updated_at: {issue.updated_at.isoformat() if hasattr(issue.updated_at, 'isoformat') else str(issue.updated_at)}\n",
+            f"  labels: [{', '.join(labels)}]\n",
+            f"  url: {issue.html_url}\n",
+            "-->\n\n",
             # 一级标题：issue 标题（链接回原文）
-            f.write(f"# [{issue.title}]({issue.html_url})\n\n")
-
+            f"# [{issue.title}]({issue.html_url})\n\n",
             # 文档说明：issue 正文
-            f.write("## 文档说明\n\n")
-            f.write(issue.body or "*(无内容)*")
-            f.write("\n")
-
-            # 评论：每个评论作为独立分段，按时间顺序排列
-            comments = list(issue.get_comments())
-            my_comments = [c for c in comments if is_me(c, me)]
-            if my_comments:
-                # 按创建时间排序
-                my_comments.sort(key=lambda c: c.created_at)
-                logger.info(f"处理issue #{issue.number} 的 {len(my_comments)} 条评论")
-
-                for c in my_comments:
-                    title, body = _extract_comment_title_and_body(c, me)
-                    f.write(f"\n## {title}\n\n")
-                    f.write(body)
-                    f.write("\n")
+            "## 文档说明\n\n",
+            issue.body or "*(无内容)*",
+            "\n",
+        ]
+
+        # 评论：每个评论作为独立分段，按时间顺序排列
+        my_comments = [c for c in comments if is_me(c, me)]
+        if my_comments:
+            # 按创建时间排序
+            my_comments.sort(key=attrgetter('created_at'))
+            logger.info(f"处理issue #{issue.number} 的 {len(my_comments)} 条评论")
+
+            for c in my_comments:
+                title, body = _extract_comment_title_and_body(c, me)
+                parts.extend((f"\n## {title}\n\n", body, "\n"))
+
+        with open(md_path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as f:
+            f.writelines(parts)
 
         logger.info(f"保存issue文件: {md_path}")
 
-        # 读取完整文件内容，统计字数与图片数（包含正文+评论）
-        with open(md_path, "r", encoding="utf-8") as f:
-            full_content = f.read()
+        # 直接基于内存中的完整内容统计字数与图片数（包含正文+评论）
+        full_content = "".join(parts)
         word_count = get_content_word_count(full_content)
         image_count = get_content_image_count(full_content)
 
         # 更新元数据
-        metadata = load_metadata()
+        standalone = metadata is None
+        if standalone:
+            metadata = load_metadata()
         metadata[str(issue.number)] = {
             "title": issue.title,
             "filename": safe_title,
@@ -160,7 +195,8 @@ def save_issue(issue, me):
             "word_count": word_count,
             "image_count": image_count
         }
-        save_metadata(metadata)
+        if standalone:
+            save_metadata(metadata)
         logger.info(f"issue #{issue.number} 字数: {word_count}, 图片: {image_count}")
 
         return md_path
@@ -169,6 +205,24 @@ def save_issue(issue, me):
         raise
 
 
+def _save_issue_task(issue, me, metadata):
+    """线程池任务：拉取评论并生成单个 issue 的 .md 文件，失败只记录日志"""
+    try:
+        save_issue(issue, me, metadata=metadata)
+    except Exception as e:
+        logger.error(f"处理 issue #{issue.number} 失败: {str(e)}")
+
+
+def save_issues(issues, me, metadata, max_workers=SAVE_ISSUE_WORKERS):
+    """并发生成多个 issue 的 .md 文件，元数据在全部完成后一次写回
+    各 issue 的评论拉取与文件写入互不依赖；GraphQL 已随查询返回的评论不会再发请求
+    """
+    # 各线程只写入各自 issue 编号对应的键
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda issue: _save_issue_task(issue, me, metadata), issues))
+    save_metadata(metadata)
+
+
 def delete_issue_files(issue):
     """删除指定 issue 的所有 .md 文件"""
     try:
@@ -179,9 +233,11 @@ def delete_issue_files(issue):
         if issue_key in metadata:
             info = metadata[issue_key]
             old_path = os.path.join(POSTS_DIR, info["label"], f"{info['filename']}.md")
-            if os.path.exists(old_path):
+            try:
                 os.remove(old_path)
                 logger.info(f"删除旧issue文件: {old_path}")
+            except FileNotFoundError:
+                pass
 
         # 遍历所有目录确保清理干净（处理元数据丢失的情况）
         for root, dirs, files in os.walk(POSTS_DIR):
@@ -212,19 +268,23 @@ def delete_issue_files(issue):
 def cleanup_empty_dirs():
     """清理 posts/ 下的空目录"""
     try:
+        # 自底向上遍历，子目录已删除则计入 removed；据 os.walk 已列出的内容判断是否为空，无需再 listdir
+        removed = set()
         for root, dirs, files in os.walk(POSTS_DIR, topdown=False):
             if root == POSTS_DIR:
                 continue
-            if not os.listdir(root):
+            if not files and all(os.path.join(root, d) in removed for d in dirs):
                 os.rmdir(root)
+                removed.add(root)
                 logger.info(f"删除空目录: {root}")
     except Exception as e:
         logger.error(f"清理空目录失败: {str(e)}")
 
 
-def export_json(repo_name):
+def export_json(repo_name, generated_at=None):
     """生成结构化 JSON 导出文件 posts_export.json
     包含所有 issue 的完整元数据 + 内容，便于程序化处理和数据迁移
+    generated_at 为本次运行的生成时间（ISO 格式），未提供时取当前 UTC 时间
     """
     try:
         metadata = load_metadata()
@@ -234,7 +294,7 @@ def export_json(repo_name):
 
         export = {
             "repository": repo_name,
-            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "generated_at": generated_at or datetime.now(timezone.utc).isoformat(),
             "total_issues": len(metadata),
             "issues": []
         }
@@ -253,18 +313,16 @@ def export_json(repo_name):
                 "url": f"https://github.com/{repo_name}/issues/{issue_number}"
             }
 
-            # 尝试读取对应的 .md 文件内容
-            md_path = os.path.join(
-                POSTS_DIR, info.get("label", "no-label"),
-                f"{info.get('filename', '')}.md"
-            )
-            if os.path.exists(md_path):
-                try:
-                    with open(md_path, "r", encoding="utf-8") as f:
-                        issue_entry["content"] = f.read()
-                except Exception as e:
-                    logger.warning(f"读取 {md_path} 失败: {e}")
-                    issue_entry["content"] = ""
+            # 尝试读取对应的 .md 文件内容，文件不存在时不写 content
+            md_path = issue_entry["md_path"]
+            try:
+                with open(md_path, "r", encoding="utf-8") as f:
+                    issue_entry["content"] = f.read()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"读取 {md_path} 失败: {e}")
+                issue_entry["content"] = ""
 
             export["issues"].append(issue_entry)
 
@@ -276,15 +334,16 @@ def export_json(repo_name):
         logger.error(f"JSON 导出失败: {str(e)}")
 
 
-def generate_index_json():
+def generate_index_json(generated_at=None):
     """生成 posts/ 目录索引 posts/index.json
     包含所有 .md 文件的路径、标题、标签、字数等元数据
+    generated_at 为本次运行的生成时间（ISO 格式），未提供时取当前 UTC 时间
     """
     try:
         import hashlib
 
         index = {
-            "generated_at": datetime.now(timezone.utc).isoformat(),
+            "generated_at": generated_at or datetime.now(timezone.utc).isoformat(),
             "entries": []
         }
 
@@ -307,7 +366,7 @@ def generate_index_json():
                         content = fh.read()
 
                     # 提取标题（第一个 H1）
-                    title_match = re.match(r'^#\s+(.+?)(?:\n|$)', content)
+                    title_match = H1_TITLE_RE.match(content)
                     title = title_match.group(1).strip() if title_match else f
 
                     wc = get_content_word_count(content)
@@ -346,6 +405,7 @@ def main():
     parser.add_argument("token", help="GitHub Personal Access Token")
     parser.add_argument("repo_name", help="仓库名称 (owner/repo)")
     parser.add_argument("--issue_number", type=int, default=None, help="指定 issue 编号")
+    parser.add_argument("--force", action="store_true", help="忽略未变化检查，重新生成全部 .md 文件")
     args = parser.parse_args()
 
     logger.info("=" * 50)
@@ -360,41 +420,38 @@ def main():
     # 获取仓库
     repo = get_repo(user, args.repo_name)
 
-    # 处理指定 issue（关闭的 issue 执行删除）
-    if args.issue_number:
-        try:
-            issue = repo.get_issue(args.issue_number)
-            if issue.state == "closed":
-                logger.info(f"Issue #{args.issue_number} 已关闭，删除文件")
-                delete_issue_files(issue)
-                cleanup_empty_dirs()
-                return
-        except Exception as e:
-            logger.error(f"获取 issue #{args.issue_number} 失败: {str(e)}")
-
-    # 获取需要生成的 issues
+    # 获取需要生成的 issues（指定 issue 时只请求该 issue 一次）
     issues = get_to_generate_issues(repo, me, args.issue_number)
+
+    # 处理指定 issue（关闭的 issue 执行删除）
+    if args.issue_number and issues and issues[0].state == "closed":
+        logger.info(f"Issue #{args.issue_number} 已关闭，删除文件")
+        delete_issue_files(issues[0])
+        cleanup_empty_dirs()
+        return
+
     logger.info(f"需要处理 {len(issues)} 个 issue")
 
     if not issues:
         logger.info("没有需要处理的 issue")
         return
 
-    # 生成 .md 文件
-    for issue in issues:
-        if not is_me(issue, me):
-            logger.debug(f"跳过非自己的 issue: #{issue.number}")
-            continue
-        try:
-            save_issue(issue, me)
-        except Exception as e:
-            logger.error(f"处理 issue #{issue.number} 失败: {str(e)}")
+    # 元数据始终完整加载，--force 只跳过未变化检查，避免写回时丢失其他 issue 的条目
+    # 指定 issue 时由 issue/评论事件触发，编辑或删除评论不一定刷新 updated_at，同样总是重新生成
+    metadata = load_metadata()
+    force = args.force or bool(args.issue_number)
+    my_issues = select_issues_to_generate(issues, me, metadata, force=force)
+    logger.info(f"其中 {len(my_issues)} 个 issue 需要重新生成")
+
+    # 并发生成 .md 文件（拉取评论 + 写文件）
+    save_issues(my_issues, me, metadata)
 
     cleanup_empty_dirs()
 
-    # 生成 JSON 结构化导出和目录索引
-    export_json(args.repo_name)
-    generate_index_json()
+    # 生成 JSON 结构化导出和目录索引，两者共用同一个生成时间
+    generated_at = datetime.now(timezone.utc).isoformat()
+    export_json(args.repo_name, generated_at)
+    generate_index_json(generated_at)
 
     logger.info("issue .md 文件生成完成")
     logger.info("=" * 50)
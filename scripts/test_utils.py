@@ -9,10 +9,15 @@
 5. 正常 open issue 应通过过滤
 6. 换行符归一化（\\r\\n → \\n）
 7. 跨平台统计一致性
+8. GraphQL 批量拉取结果与 PyGithub 属性对齐
+9. 限流重试策略
+10. 内容未变化时跳过文件写入
+11. 未变化 issue 的跳过与 --force 重新生成
 """
 
 import sys
 import os
+import tempfile
 import unittest
 from unittest.mock import MagicMock, patch
 
@@ -27,7 +32,15 @@ from scripts.utils import (
     _normalize_line_endings,
     get_content_word_count,
     get_content_image_count,
+    _GraphQLIssue,
+    _build_retry,
+    fetch_repo_data,
+    write_if_changed,
+    write_file_atomic,
+    format_time,
 )
+from scripts.generate_posts import select_issues_to_generate
+from scripts.update_readme import get_top_issues, get_todo_issues
 
 
 def _make_mock_issue(number, title, state, body, pull_request=None, user_login="test_user"):
@@ -338,5 +351,289 @@ class TestCrossPlatformConsistency(unittest.TestCase):
         self.assertEqual(get_content_image_count(windows_content), ic)
 
 
+def _make_graphql_node(number, updated, state="OPEN", labels=(), comments=(), total_comments=None):
+    """辅助函数：构造 GraphQL 返回的 issue 节点"""
+    return {
+        "number": number,
+        "title": f"issue {number}",
+        "url": f"https://github.com/o/r/issues/{number}",
+        "body": "正文",
+        "state": state,
+        "createdAt": "2026-06-01T00:00:00Z",
+        "updatedAt": updated,
+        "author": {"login": "me"},
+        "labels": {"nodes": [{"name": n} for n in labels]},
+        "comments": {
+            "totalCount": len(comments) if total_comments is None else total_comments,
+            "pageInfo": {"hasNextPage": total_comments is not None and total_comments > len(comments),
+                         "endCursor": "cc"},
+            "nodes": [{"body": b, "createdAt": "2026-06-02T00:00:00Z", "author": {"login": "me"}} for b in comments],
+        },
+    }
+
+
+class TestGraphQLIssue(unittest.TestCase):
+    """测试 GraphQL 节点到 issue 对象的转换"""
+
+    def test_attributes_aligned_with_pygithub(self):
+        issue = _GraphQLIssue(_make_graphql_node(3, "2026-06-16T09:48:32Z", labels=("my-diary",)), repo=None)
+        self.assertEqual(issue.number, 3)
+        self.assertEqual(issue.state, "open")
+        self.assertEqual(issue.user.login, "me")
+        self.assertEqual([l.name for l in issue.labels], ["my-diary"])
+        self.assertEqual(issue.updated_at.isoformat(), "2026-06-16T09:48:32+00:00")
+        self.assertFalse(is_pull_request(issue))
+
+    def test_merged_pull_request_is_closed(self):
+        issue = _GraphQLIssue(_make_graphql_node(5, "2026-06-16T09:48:32Z", state="MERGED"), repo=None, is_pull=True)
+        self.assertEqual(issue.state, "closed")
+        self.assertTrue(is_pull_request(issue))
+
+    def test_comments_from_query(self):
+        repo = MagicMock()
+        issue = _GraphQLIssue(_make_graphql_node(1, "2026-06-16T09:48:32Z", comments=("a", "b")), repo)
+        self.assertEqual([c.body for c in issue.get_comments()], ["a", "b"])
+        repo.get_issue.assert_not_called()
+
+    def test_comments_overflow_paginates_with_graphql(self):
+        repo = MagicMock()
+        repo.full_name = "o/r"
+        page = {"pageInfo": {"hasNextPage": False, "endCursor": None},
+                "nodes": [{"body": b, "createdAt": "2026-06-03T00:00:00Z", "author": {"login": "me"}} for b in ("b", "c")]}
+        repo._requester.requestJsonAndCheck.return_value = ({}, {"data": {"repository": {"issueOrPullRequest": {"comments": page}}}})
+        issue = _GraphQLIssue(_make_graphql_node(1, "2026-06-16T09:48:32Z", comments=("a",), total_comments=3), repo)
+        self.assertEqual([c.body for c in issue.get_comments()], ["a", "b", "c"])
+        variables = repo._requester.requestJsonAndCheck.call_args.kwargs["input"]["variables"]
+        self.assertEqual((variables["number"], variables["cursor"]), (1, "cc"))
+        repo.get_issue.assert_not_called()
+
+    def test_comments_overflow_falls_back_to_rest(self):
+        repo = MagicMock()
+        repo.full_name = "o/r"
+        repo._requester.requestJsonAndCheck.return_value = ({}, {"errors": [{"message": "boom"}]})
+        repo.get_issue.return_value.get_comments.return_value = ["a", "b", "c"]
+        issue = _GraphQLIssue(_make_graphql_node(1, "2026-06-16T09:48:32Z", comments=("a",), total_comments=3), repo)
+        self.assertEqual(issue.get_comments(), ["a", "b", "c"])
+        repo.get_issue.assert_called_once_with(1)
+
+
+class TestFetchRepoData(unittest.TestCase):
+    """测试 fetch_repo_data 的分页与回退"""
+
+    def _page(self, nodes, has_next, first_page, more_labels=False):
+        repository = {"issues": {"pageInfo": {"hasNextPage": has_next, "endCursor": "c1"}, "nodes": nodes}}
+        if first_page:
+            repository["labels"] = {"pageInfo": {"hasNextPage": more_labels, "endCursor": "l1"},
+                                    "nodes": [{"name": "my-diary", "description": "日记"}]}
+            repository["pullRequests"] = {
+                "pageInfo": {"hasNextPage": False, "endCursor": None},
+                "nodes": [_make_graphql_node(9, "2026-06-10T00:00:00Z", state="MERGED",
+                                             labels=("the-lore",), comments=("LGTM",))],
+            }
+        return {}, {"data": {"repository": repository}}
+
+    def test_paginates_and_sorts(self):
+        repo = MagicMock()
+        repo.full_name = "o/r"
+        repo._requester.requestJsonAndCheck.side_effect = [
+            self._page([_make_graphql_node(1, "2026-06-01T00:00:00Z")], True, True),
+            self._page([_make_graphql_node(2, "2026-06-20T00:00:00Z")], False, False),
+        ]
+        issues, labels = fetch_repo_data(repo, "me")
+        self.assertEqual([i.number for i in issues], [2, 9, 1])
+        self.assertEqual([l.name for l in labels], ["my-diary"])
+        self.assertEqual(repo._requester.requestJsonAndCheck.call_count, 2)
+        variables = repo._requester.requestJsonAndCheck.call_args.kwargs["input"]["variables"]
+        self.assertEqual(variables["creator"], "me")
+        repo.get_issues.assert_not_called()
+
+    def test_pull_requests_keep_labels_and_comments(self):
+        repo = MagicMock()
+        repo.full_name = "o/r"
+        repo._requester.requestJsonAndCheck.return_value = self._page([], False, True)
+        issues, _ = fetch_repo_data(repo, "me")
+        pr = issues[0]
+        self.assertTrue(is_pull_request(pr))
+        self.assertEqual([l.name for l in pr.labels], ["the-lore"])
+        self.assertEqual([c.body for c in pr.get_comments()], ["LGTM"])
+
+    def test_paginates_repository_labels(self):
+        repo = MagicMock()
+        repo.full_name = "o/r"
+        more = {"pageInfo": {"hasNextPage": False, "endCursor": None}, "nodes": [{"name": "the-lore", "description": None}]}
+        repo._requester.requestJsonAndCheck.side_effect = [
+            self._page([_make_graphql_node(1, "2026-06-01T00:00:00Z")], False, True, more_labels=True),
+            ({}, {"data": {"repository": {"labels": more}}}),
+        ]
+        _, labels = fetch_repo_data(repo, "me")
+        self.assertEqual([l.name for l in labels], ["my-diary", "the-lore"])
+        variables = repo._requester.requestJsonAndCheck.call_args.kwargs["input"]["variables"]
+        self.assertEqual(variables["cursor"], "l1")
+
+    def test_open_state_filters_issues_and_pull_requests(self):
+        repo = MagicMock()
+        repo.full_name = "o/r"
+        first = self._page([], False, True)
+        first[1]["data"]["repository"]["pullRequests"]["pageInfo"] = {"hasNextPage": True, "endCursor": "p1"}
+        more = {"pageInfo": {"hasNextPage": False, "endCursor": None}, "nodes": []}
+        repo._requester.requestJsonAndCheck.side_effect = [
+            first, ({}, {"data": {"repository": {"pullRequests": more}}}),
+        ]
+        fetch_repo_data(repo, "me", state="open")
+        calls = repo._requester.requestJsonAndCheck.call_args_list
+        self.assertEqual(calls[0].kwargs["input"]["variables"]["states"], ["OPEN"])
+        self.assertEqual(calls[0].kwargs["input"]["variables"]["prStates"], ["OPEN"])
+        self.assertEqual(calls[1].kwargs["input"]["variables"]["prStates"], ["OPEN"])
+
+    def test_falls_back_to_rest_on_error(self):
+        repo = MagicMock()
+        repo.full_name = "o/r"
+        repo._requester.requestJsonAndCheck.return_value = ({}, {"errors": [{"message": "boom"}]})
+        rest_issue = _make_mock_issue(1, "test", "open", "body", pull_request=False)
+        repo.get_issues.return_value = [rest_issue]
+        repo.get_labels.return_value = []
+        issues, labels = fetch_repo_data(repo)
+        self.assertEqual(issues, [rest_issue])
+        repo.get_issues.assert_called_once_with(state='all', sort='updated', direction='desc')
+
+    def test_rest_fallback_keeps_state(self):
+        repo = MagicMock()
+        repo.full_name = "o/r"
+        repo._requester.requestJsonAndCheck.side_effect = RuntimeError("boom")
+        repo.get_issues.return_value = []
+        repo.get_labels.return_value = []
+        fetch_repo_data(repo, "me", state="open")
+        repo.get_issues.assert_called_once_with(state='open', sort='updated', direction='desc')
+
+
+class TestBuildRetry(unittest.TestCase):
+    """测试请求重试策略"""
+
+    def test_uses_default_retry_when_github_retry_available(self):
+        with patch("scripts.utils.github.GithubRetry", create=True):
+            self.assertIsNone(_build_retry())
+
+    def test_retries_rate_limited_post(self):
+        with patch("scripts.utils.github") as fake_github:
+            del fake_github.GithubRetry
+            retry = _build_retry()
+        self.assertTrue(retry.is_retry("POST", 403, has_retry_after=True))
+        self.assertFalse(retry.is_retry("POST", 403, has_retry_after=False))
+        self.assertTrue(retry.is_retry("GET", 429, has_retry_after=False))
+        self.assertTrue(retry.increment("GET", "/x").is_retry("GET", 403, has_retry_after=True))
+        self.assertFalse(retry.is_retry("GET", 404, has_retry_after=False))
+        self.assertFalse(retry.raise_on_status)
+
+
+class TestFormatTime(unittest.TestCase):
+    """测试时间格式化"""
+
+    def test_converts_to_beijing_time(self):
+        from datetime import datetime, timezone
+        self.assertEqual(format_time(datetime(2026, 6, 16, 9, 48)), "2026-06-16 17:48")
+        self.assertEqual(format_time(datetime(2026, 6, 16, 9, 48, tzinfo=timezone.utc)), "2026-06-16 17:48")
+
+    def test_non_datetime_input(self):
+        self.assertEqual(format_time(None), "未知时间")
+        self.assertEqual(format_time({"updated_at": "2026-06-16"}), "未知时间")
+
+
+class TestWriteIfChanged(unittest.TestCase):
+    """测试内容未变化时跳过写入"""
+
+    def test_skips_identical_content(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "README.md")
+            self.assertTrue(write_if_changed(path, "# 博客\n"))
+            mtime = os.stat(path).st_mtime_ns
+            self.assertFalse(write_if_changed(path, "# 博客\n"))
+            self.assertEqual(os.stat(path).st_mtime_ns, mtime)
+            self.assertTrue(write_if_changed(path, "# 博客\n新文章\n"))
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "# 博客\n新文章\n")
+
+    def test_write_file_atomic_always_writes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "feed.xml")
+            write_file_atomic(path, "<rss/>\n")
+            write_file_atomic(path, "<rss>\n</rss>\n")
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(f.read(), "<rss>\n</rss>\n")
+            # 临时文件已被替换掉，不会残留
+            self.assertEqual(os.listdir(tmp), ["feed.xml"])
+
+
+class TestTopTodoIssues(unittest.TestCase):
+    """测试置顶/待办筛选：与 REST 的 labels 过滤一致，须同时带有全部标签"""
+
+    def _issue(self, *names):
+        issue = MagicMock()
+        issue.labels = []
+        for name in names:
+            label = MagicMock()
+            label.name = name
+            issue.labels.append(label)
+        return issue
+
+    def test_top_requires_all_labels(self):
+        both = self._issue("Top", "置顶", "my-diary")
+        only_one = self._issue("Top")
+        self.assertEqual(get_top_issues([both, only_one]), [both])
+
+    def test_todo_requires_all_labels(self):
+        both = self._issue("TODO", "待办")
+        only_one = self._issue("待办")
+        self.assertEqual(get_todo_issues([only_one, both]), [both])
+
+
+class TestSelectIssuesToGenerate(unittest.TestCase):
+    """测试 generate_posts 中未变化 issue 的跳过与强制重新生成"""
+
+    UPDATED = "2026-06-16T09:48:32+00:00"
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        cwd = os.getcwd()
+        os.chdir(tmp.name)
+        self.addCleanup(os.chdir, cwd)
+        os.makedirs(os.path.join("posts", "my-diary"))
+        with open(os.path.join("posts", "my-diary", "Post.md"), "w", encoding="utf-8") as f:
+            f.write("# Post\n")
+        self.metadata = {
+            "1": {"filename": "Post", "label": "my-diary", "updated": self.UPDATED},
+            "2": {"filename": "Other", "label": "no-label", "updated": self.UPDATED},
+        }
+
+    def _issue(self, number, updated=UPDATED, user_login="me"):
+        issue = _make_mock_issue(number, "Post", "open", "body", pull_request=False, user_login=user_login)
+        issue.updated_at = MagicMock()
+        issue.updated_at.isoformat.return_value = updated
+        return issue
+
+    def test_skips_unchanged_issue(self):
+        issue = self._issue(1)
+        self.assertEqual(select_issues_to_generate([issue], "me", self.metadata), [])
+
+    def test_regenerates_changed_issue(self):
+        issue = self._issue(1, updated="2026-07-01T00:00:00+00:00")
+        self.assertEqual(select_issues_to_generate([issue], "me", self.metadata), [issue])
+
+    def test_regenerates_issue_missing_from_metadata(self):
+        issue = self._issue(3)
+        self.assertEqual(select_issues_to_generate([issue], "me", self.metadata), [issue])
+        self.assertNotIn("3", self.metadata)
+
+    def test_skips_other_authors(self):
+        issue = self._issue(1, user_login="someone")
+        self.assertEqual(select_issues_to_generate([issue], "me", self.metadata, force=True), [])
+
+    def test_force_regenerates_and_keeps_metadata(self):
+        issue = self._issue(1)
+        before = {k: dict(v) for k, v in self.metadata.items()}
+        self.assertEqual(select_issues_to_generate([issue], "me", self.metadata, force=True), [issue])
+        self.assertEqual(self.metadata, before)
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -9,53 +9,53 @@ import sys
 # 将项目根目录加入 sys.path，使脚本可直接 python scripts/xxx.py 运行
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+import io
+import heapq
 import logging
+import re
+from operator import attrgetter
 from datetime import datetime, timedelta, timezone
+from xml.sax.saxutils import escape
 
 from scripts.utils import (
     logger, login, get_repo, get_me, is_me, format_time,
     get_issue_word_count, get_issue_image_count, load_metadata,
     is_pull_request, should_include_issue,
-    count_from_md_file, log_environment,
+    count_from_md_file, log_environment, fetch_repo_data,
+    write_if_changed, write_file_atomic,
     TOP_ISSUES_LABELS, TODO_ISSUES_LABELS, IGNORE_LABELS,
     RECENT_ISSUE_LIMIT, BEIJING_TZ
 )
 
+# XML 1.0 不允许的字符（控制字符、代理区、U+FFFE/U+FFFF），一次正则替换在 C 层完成过滤
+XML_INVALID_CHAR_RE = re.compile('[^\x09\x0A\x0D\x20-\uD7FF\uE000-\uFFFD\U00010000-\U0010FFFF]')
 
-def get_todo_issues(repo):
-    """获取待办issue"""
-    try:
-        return repo.get_issues(state='all', labels=TODO_ISSUES_LABELS)
-    except Exception as e:
-        logger.error(f"获取待办文章失败: {str(e)}")
-        return []
 
+def split_issues_by_author(issues, me):
+    """将issue按作者一次性分为自己的和他人的，每个issue只判断一次归属"""
+    my_issues, other_issues = [], []
+    for issue in issues:
+        (my_issues if is_me(issue, me) else other_issues).append(issue)
+    return my_issues, other_issues
 
-def get_top_issues(repo):
-    """获取置顶issue"""
-    try:
-        return repo.get_issues(state='all', labels=TOP_ISSUES_LABELS)
-    except Exception as e:
-        logger.error(f"获取置顶文章失败: {str(e)}")
-        return []
 
+def get_todo_issues(issues):
+    """获取待办issue，与原先 get_issues(labels=...) 一致，须同时带有全部待办标签"""
+    return [issue for issue in issues if TODO_ISSUES_LABELS <= {l.name for l in issue.labels}]
 
-def get_repo_labels(repo):
-    """获取仓库所有标签"""
-    try:
-        return list(repo.get_labels())
-    except Exception as e:
-        logger.error(f"获取仓库标签失败: {str(e)}")
-        return []
 
+def get_top_issues(issues):
+    """获取置顶issue，与原先 get_issues(labels=...) 一致，须同时带有全部置顶标签"""
+    return [issue for issue in issues if TOP_ISSUES_LABELS <= {l.name for l in issue.labels}]
 
-def get_issues_from_label(repo, label):
-    """获取特定标签的issue"""
-    try:
-        return repo.get_issues(state='all', labels=(label,))
-    except Exception as e:
-        logger.error(f"获取标签issue失败: {str(e)}")
-        return []
+
+def group_issues_by_label(issues):
+    """一次遍历将issue按标签名分组，返回 标签名 -> issue列表"""
+    groups = {}
+    for issue in issues:
+        for label in issue.labels:
+            groups.setdefault(label.name, []).append(issue)
+    return groups
 
 
 def add_issue_info(issue, md):
@@ -67,111 +67,100 @@ def add_issue_info(issue, md):
         logger.error(f"添加issue信息失败 #{issue.number}: {str(e)}")
 
 
-def add_md_todo(repo, md, me):
-    """添加待办事项到Markdown文件"""
+def add_md_todo(my_issues, md):
+    """添加待办事项到Markdown文件（my_issues 为本人的issue，需已按更新时间降序排列）"""
     try:
-        todo_issues = list(get_todo_issues(repo))
+        todo_issues = get_todo_issues(my_issues)
         if not TODO_ISSUES_LABELS or not todo_issues:
             logger.debug("没有找到待办标签或待办文章")
             return
-        todo_issues = sorted(todo_issues, key=lambda x: x.updated_at, reverse=True)
         logger.debug(f"找到 {len(todo_issues)} 个待办文章")
 
-        with open(md, "a+", encoding="utf-8") as md_file:
-            md_file.write("## 待办事项\n")
-            for issue in todo_issues:
-                if is_me(issue, me):
-                    add_issue_info(issue, md_file)
+        md.write("## 待办事项\n")
+        for issue in todo_issues:
+            add_issue_info(issue, md)
     except Exception as e:
         logger.error(f"添加待办事项部分失败: {str(e)}")
         raise
 
 
-def add_md_top(repo, md, me):
-    """添加置顶文章到Markdown文件"""
+def add_md_top(my_issues, md):
+    """添加置顶文章到Markdown文件（my_issues 为本人的issue，需已按更新时间降序排列）"""
     try:
-        top_issues = list(get_top_issues(repo))
+        top_issues = get_top_issues(my_issues)
         if not TOP_ISSUES_LABELS or not top_issues:
             logger.debug("没有找到Top标签或置顶文章")
             return
-        top_issues = sorted(top_issues, key=lambda x: x.updated_at, reverse=True)
         logger.debug(f"找到 {len(top_issues)} 个置顶文章")
 
-        with open(md, "a+", encoding="utf-8") as md_file:
-            md_file.write("## 置顶文章\n")
-            for issue in top_issues:
-                if is_me(issue, me):
-                    add_issue_info(issue, md_file)
+        md.write("## 置顶文章\n")
+        for issue in top_issues:
+            add_issue_info(issue, md)
     except Exception as e:
         logger.error(f"添加置顶文章部分失败: {str(e)}")
         raise
 
 
-def add_md_recent(repo, md, me, limit=RECENT_ISSUE_LIMIT):
-    """添加文章列表到Markdown文件"""
+def add_md_recent(my_issues, md, metadata, limit=RECENT_ISSUE_LIMIT):
+    """添加文章列表到Markdown文件（my_issues 为本人的issue，需已按更新时间降序排列）
+    metadata 为生成 .md 文件时记录的元数据（含完整字数/图片数）
+    """
     try:
         count = 0
-        with open(md, "a+", encoding="utf-8") as md_file:
-            try:
-                md_file.write("## 文章列表\n")
-                md_file.write("| 序号 | 文章标题 | 更新时间 | 字数统计 | 插图统计 |\n")
-                md_file.write("|:------:|:------------------:|:------------------:|:------:|:------:|\n")
-                logger.debug("获取所有issue并按更新时间排序...")
-                all_issues = sorted(repo.get_issues(state='all'), key=lambda x: x.updated_at, reverse=True)
-                logger.debug(f"获取到 {len(all_issues)} 个issue")
-
-                # 加载元数据（含生成 .md 文件时计算的完整字数/图片数）
-                metadata = load_metadata()
-
-                for issue in all_issues:
-                    if is_me(issue, me) and should_include_issue(issue, metadata):
-                        time = format_time(issue.updated_at)
-
-                        # 三层回退：元数据 → .md 文件 → issue.body
-                        issue_key = str(issue.number)
-                        word_count = None
-                        image_count = None
-                        source = "unknown"
-
-                        if issue_key in metadata and "word_count" in metadata[issue_key]:
-                            word_count = metadata[issue_key]["word_count"]
-                            image_count = metadata[issue_key].get("image_count", 0)
-                            source = "metadata"
-                            logger.debug(f"[STAT_SRC] #{issue.number} 使用元数据: wc={word_count}, ic={image_count}")
-
-                        if word_count is None:
-                            wc, ic = count_from_md_file(issue.number, issue.title)
-                            if wc is not None:
-                                word_count = wc
-                                image_count = ic
-                                source = "md_file"
-                                logger.info(f"[STAT_SRC] #{issue.number} 回退到 .md 文件: wc={word_count}, ic={image_count}")
-
-                        if word_count is None:
-                            word_count = get_issue_word_count(issue)
-                            image_count = get_issue_image_count(issue)
-                            source = "issue_body"
-                            logger.warning(f"[STAT_SRC] #{issue.number} 回退到 issue.body: wc={word_count}, ic={image_count}")
-
-                        md_file.write(
-                            f"| {count + 1} | [{issue.title}]({issue.html_url}) "
-                            f"| {time} | {word_count} | {image_count} |\n"
-                        )
-                        count += 1
-                        if count >= limit:
-                            break
-                logger.debug(f"已添加 {count} 个最近更新的issue")
-            except Exception as e:
-                logger.error(f"添加最近更新部分时发生异常: {str(e)}")
+        try:
+            md.write("## 文章列表\n")
+            md.write("| 序号 | 文章标题 | 更新时间 | 字数统计 | 插图统计 |\n")
+            md.write("|:------:|:------------------:|:------------------:|:------:|:------:|\n")
+            logger.debug(f"获取到 {len(my_issues)} 个issue")
+
+            for issue in my_issues:
+                if should_include_issue(issue, metadata):
+                    time = format_time(issue.updated_at)
+
+                    # 三层回退：元数据 → .md 文件 → issue.body
+                    issue_key = str(issue.number)
+                    word_count = None
+                    image_count = None
+                    source = "unknown"
+
+                    if issue_key in metadata and "word_count" in metadata[issue_key]:
+                        word_count = metadata[issue_key]["word_count"]
+                        image_count = metadata[issue_key].get("image_count", 0)
+                        source = "metadata"
+                        logger.debug(f"[STAT_SRC] #{issue.number} 使用元数据: wc={word_count}, ic={image_count}")
+
+                    if word_count is None:
+                        wc, ic = count_from_md_file(issue.number, issue.title)
+                        if wc is not None:
+                            word_count = wc
+                            image_count = ic
+                            source = "md_file"
+                            logger.info(f"[STAT_SRC] #{issue.number} 回退到 .md 文件: wc={word_count}, ic={image_count}")
+
+                    if word_count is None:
+                        word_count = get_issue_word_count(issue)
+                        image_count = get_issue_image_count(issue)
+                        source = "issue_body"
+                        logger.warning(f"[STAT_SRC] #{issue.number} 回退到 issue.body: wc={word_count}, ic={image_count}")
+
+                    md.write(
+                        f"| {count + 1} | [{issue.title}]({issue.html_url}) "
+                        f"| {time} | {word_count} | {image_count} |\n"
+                    )
+                    count += 1
+                    if count >= limit:
+                        break
+            logger.debug(f"已添加 {count} 个最近更新的issue")
+        except Exception as e:
+            logger.error(f"添加最近更新部分时发生异常: {str(e)}")
     except Exception as e:
         logger.error(f"添加最近更新部分失败: {str(e)}")
         raise
 
 
-def add_md_label(repo, md, me):
-    """添加标签分类的issue到Markdown文件"""
+def add_md_label(my_issues, labels, md):
+    """添加标签分类的issue到Markdown文件（my_issues 为本人的issue，需已按更新时间降序排列）"""
     try:
-        labels = get_repo_labels(repo)
         labels = sorted(
             labels,
             key=lambda x: (
@@ -181,100 +170,108 @@ def add_md_label(repo, md, me):
                 x.name,
             ),
         )
+        label_groups = group_issues_by_label(my_issues)
+
+        for label in labels:
+            if label.name in IGNORE_LABELS:
+                continue
+
+            issues_list = label_groups.get(label.name)
+            if not issues_list:
+                continue
 
-        with open(md, "a+", encoding="utf-8") as md_file:
-            for label in labels:
-                if label.name in IGNORE_LABELS:
-                    continue
-
-                issues = get_issues_from_label(repo, label)
-                issues_list = list(issues)
-                if not issues_list:
-                    continue
-
-                md_file.write(f"## {label.name}\n")
-                issues_list = sorted(issues_list, key=lambda x: x.updated_at, reverse=True)
-                logger.debug(f"标签 '{label.name}' 下有 {len(issues_list)} 个issue")
-
-                i = 0
-                for issue in issues_list:
-                    if not issue:
-                        continue
-                    if is_me(issue, me):
-                        add_issue_info(issue, md_file)
-                        i += 1
-                if i > 0:
-                    md_file.write("\n")
+            md.write(f"## {label.name}\n")
+            logger.debug(f"标签 '{label.name}' 下有 {len(issues_list)} 个issue")
+
+            for issue in issues_list:
+                add_issue_info(issue, md)
+            md.write("\n")
     except Exception as e:
         logger.error(f"添加标签分类部分失败: {str(e)}")
         raise
 
 
-def generate_changelog(repo, me):
-    """生成 CHANGELOG.md — 记录非本人的 PR（Dependabot 等），独立于 README"""
+def generate_changelog(other_issues):
+    """生成 CHANGELOG.md — 记录非本人的 PR（Dependabot 等），独立于 README
+    other_issues 为非本人创建的 issue/PR
+    """
     try:
-        all_issues = list(repo.get_issues(state='all'))
-        # 筛选非本人的 PR
-        bot_prs = [issue for issue in all_issues if not is_me(issue, me) and is_pull_request(issue)]
-        bot_prs = sorted(bot_prs, key=lambda x: x.updated_at, reverse=True)
+        # 筛选 PR，只取最近更新的 RECENT_ISSUE_LIMIT 条，无需整体排序
+        bot_prs = heapq.nlargest(
+            RECENT_ISSUE_LIMIT,
+            (issue for issue in other_issues if is_pull_request(issue)),
+            key=attrgetter('updated_at')
+        )
 
         if not bot_prs:
             logger.debug("没有找到第三方 PR，跳过 CHANGELOG 生成")
             return
 
-        with open("CHANGELOG.md", "w", encoding="utf-8") as f:
-            f.write("# 更新日志\n\n")
-            f.write("> 本文件由自动化工作流生成，记录第三方提交的 Pull Request（如 Dependabot）。\n\n")
-            f.write("| PR 标题 | 链接 | 更新时间 |\n")
-            f.write("|:--------|:-----|:--------|\n")
-            for pr in bot_prs[:RECENT_ISSUE_LIMIT]:
-                time = format_time(pr.updated_at)
-                f.write(f"| {pr.title} | [PR #{pr.number}]({pr.html_url}) | {time} |\n")
-
-        logger.info(f"CHANGELOG.md 生成成功，共 {len(bot_prs[:RECENT_ISSUE_LIMIT])} 条 PR")
+        md = io.StringIO()
+        md.write("# 更新日志\n\n")
+        md.write("> 本文件由自动化工作流生成，记录第三方提交的 Pull Request（如 Dependabot）。\n\n")
+        md.write("| PR 标题 | 链接 | 更新时间 |\n")
+        md.write("|:--------|:-----|:--------|\n")
+        for pr in bot_prs:
+            time = format_time(pr.updated_at)
+            md.write(f"| {pr.title} | [PR #{pr.number}]({pr.html_url}) | {time} |\n")
+        write_if_changed("CHANGELOG.md", md.getvalue())
+
+        logger.info(f"CHANGELOG.md 生成成功，共 {len(bot_prs)} 条 PR")
     except Exception as e:
         logger.error(f"生成 CHANGELOG.md 失败: {str(e)}")
 
 
-def generate_rss_feed(repo, me):
-    """生成RSS feed文件"""
+def _xml_text(text):
+    """去掉 XML 不允许的字符并转义 & < >，用于写入 XML 文本节点"""
+    return escape(XML_INVALID_CHAR_RE.sub('', text))
+
+
+def generate_rss_feed(repo, my_issues, now):
+    """生成RSS feed文件
+    my_issues 为本人创建的 issue/PR，now 为本次运行的 UTC 时间
+    """
     try:
-        all_issues = sorted(
-            [issue for issue in repo.get_issues(state='all') if is_me(issue, me) and not is_pull_request(issue)],
-            key=lambda x: x.updated_at, reverse=True
+        # 只取最近更新的 RECENT_ISSUE_LIMIT 篇，无需整体排序
+        recent_issues = heapq.nlargest(
+            RECENT_ISSUE_LIMIT,
+            (issue for issue in my_issues if not is_pull_request(issue)),
+            key=attrgetter('updated_at')
         )
 
-        rss_content = f"""<?xml version="1.0" encoding="UTF-8"?>
-<rss version="2.0">
-<channel>
-    <title>{repo.name} Blog</title>
-    <link>{repo.html_url}</link>
-    <description>Blog generated from GitHub issues</description>
-    <language>zh-CN</language>
-    <lastBuildDate>{datetime.now().strftime('%a, %d %b %Y %H:%M:%S GMT')}</lastBuildDate>
-"""
+        # 各片段收集到列表，最后一次写入，避免循环中反复拼接字符串
+        parts = [
+            '<?xml version="1.0" encoding="UTF-8"?>\n',
+            '<rss version="2.0">\n',
+            '<channel>\n',
+            f"    <title>{_xml_text(repo.name)} Blog</title>\n",
+            f"    <link>{_xml_text(repo.html_url)}</link>\n",
+            "    <description>Blog generated from GitHub issues</description>\n",
+            "    <language>zh-CN</language>\n",
+            f"    <lastBuildDate>{now.strftime('%a, %d %b %Y %H:%M:%S GMT')}</lastBuildDate>\n",
+        ]
 
-        for issue in all_issues[:RECENT_ISSUE_LIMIT]:
+        for issue in recent_issues:
             pub_date = issue.updated_at.strftime('%a, %d %b %Y %H:%M:%S GMT')
             body = issue.body or ""
+            # 先截断再过滤转义，只处理摘要部分而非整篇正文
             description = (body[:200] + '...') if len(body) > 200 else body
-            rss_content += f"""
-    <item>
-        <title>{issue.title}</title>
-        <link>{issue.html_url}</link>
-        <description>{description}</description>
-        <pubDate>{pub_date}</pubDate>
-        <guid>{issue.html_url}</guid>
-    </item>
-"""
-
-        rss_content += """
-</channel>
-</rss>
-"""
-
-        with open("feed.xml", "w", encoding="utf-8") as f:
-            f.write(rss_content)
+            link = _xml_text(issue.html_url)
+            parts.extend((
+                "\n",
+                "    <item>\n",
+                f"        <title>{_xml_text(issue.title)}</title>\n",
+                f"        <link>{link}</link>\n",
+                f"        <description>{_xml_text(description)}</description>\n",
+                f"        <pubDate>{pub_date}</pubDate>\n",
+                f"        <guid>{link}</guid>\n",
+                "    </item>\n",
+            ))
+
+        parts.append("\n</channel>\n</rss>\n")
+
+        # lastBuildDate 每次运行都会变化，内容比较没有意义，直接写入
+        write_file_atomic("feed.xml", "".join(parts))
 
         logger.info("RSS feed生成成功")
     except Exception as e:
@@ -304,38 +301,40 @@ def ensure_readme_exists():
         raise
 
 
-def regenerate_readme(repo, repo_name, me):
-    """重新生成README.md文件"""
+def regenerate_readme(my_issues, other_issues, labels, now):
+    """重新生成README.md文件
+    my_issues / other_issues 为全部issue按作者划分后的两部分，
+    需已按更新时间降序排列（fetch_repo_data 的返回顺序），各模块筛选后保持该顺序，无需各自排序
+    now 为本次运行的 UTC 时间，与 feed.xml 共用
+    """
     try:
         log_environment()
         logger.info("开始重新生成README.md...")
 
-        # 清空 README.md
-        with open("README.md", "w", encoding="utf-8") as f:
-            f.write("")
+        # 元数据只读取一次，文章列表与统计共用
+        metadata = load_metadata()
 
-        # 添加各模块
-        add_md_top(repo, "README.md", me)
-        add_md_todo(repo, "README.md", me)
-        add_md_label(repo, "README.md", me)
-        add_md_recent(repo, "README.md", me)
+        # 各模块写入内存缓冲区，最后一次性落盘
+        md = io.StringIO()
+        add_md_top(my_issues, md)
+        add_md_todo(my_issues, md)
+        add_md_label(my_issues, labels, md)
+        add_md_recent(my_issues, md, metadata)
 
         # 生成 CHANGELOG.md（第三方 PR 独立文档）
-        generate_changelog(repo, me)
+        generate_changelog(other_issues)
 
         # 统计信息
-        beijing_now = datetime.now(BEIJING_TZ)
+        beijing_now = now.astimezone(BEIJING_TZ)
         update_time = beijing_now.strftime("%Y-%m-%d %H:%M:%S")
 
-        all_issues = list(repo.get_issues(state='all'))
-        my_issues = [issue for issue in all_issues if is_me(issue, me) and not is_pull_request(issue)]
-        total_articles = len(my_issues)
+        my_posts = [issue for issue in my_issues if not is_pull_request(issue)]
+        total_articles = len(my_posts)
 
         # 优先从元数据读取（含评论），回退到仅统计 issue.body
-        metadata = load_metadata()
         total_word_count = 0
         total_image_count = 0
-        for issue in my_issues:
+        for issue in my_posts:
             issue_key = str(issue.number)
             if issue_key in metadata and "word_count" in metadata[issue_key]:
                 total_word_count += metadata[issue_key]["word_count"]
@@ -347,22 +346,24 @@ def regenerate_readme(repo, repo_name, me):
         # 最近24小时内的新增和更新
         recent_threshold = beijing_now - timedelta(hours=24)
         recent_updated = [
-            issue for issue in my_issues
+            issue for issue in my_posts
             if issue.updated_at.replace(tzinfo=timezone.utc).astimezone(BEIJING_TZ) > recent_threshold
         ]
         recent_created = [
-            issue for issue in my_issues
+            issue for issue in my_posts
             if issue.created_at.replace(tzinfo=timezone.utc).astimezone(BEIJING_TZ) > recent_threshold
         ]
 
-        with open("README.md", "a+", encoding="utf-8") as f:
-            f.write("\n\n## 博客统计\n")
-            f.write(f"- 最后更新: {update_time}\n")
-            f.write(f"- 总文章数: {total_articles}\n")
-            f.write(f"- 新增文章: {len(recent_created)}\n")
-            f.write(f"- 更新文章: {len(recent_updated)}\n")
-            f.write(f"- 总字数: {total_word_count}\n")
-            f.write(f"- 总插图数: {total_image_count}\n")
+        md.write("\n\n## 博客统计\n")
+        md.write(f"- 最后更新: {update_time}\n")
+        md.write(f"- 总文章数: {total_articles}\n")
+        md.write(f"- 新增文章: {len(recent_created)}\n")
+        md.write(f"- 更新文章: {len(recent_updated)}\n")
+        md.write(f"- 总字数: {total_word_count}\n")
+        md.write(f"- 总插图数: {total_image_count}\n")
+
+        # 含本次运行的更新时间，每次内容都不同，直接写入
+        write_file_atomic("README.md", md.getvalue())
 
         logger.info("README.md 重新生成完成")
     except Exception as e:
@@ -390,14 +391,21 @@ def main():
     # 获取仓库
     repo = get_repo(user, args.repo_name)
 
+    # 一次性拉取全部 issue 与标签，各模块复用
+    issues, labels = fetch_repo_data(repo, me)
+    my_issues, other_issues = split_issues_by_author(issues, me)
+
     # 确保 README.md 存在
     ensure_readme_exists()
 
+    # 本次运行只读取一次时钟，README 与 feed 的时间一致
+    now = datetime.now(timezone.utc)
+
     # 重新生成 README.md
-    regenerate_readme(repo, args.repo_name, me)
+    regenerate_readme(my_issues, other_issues, labels, now)
 
     # 生成 RSS feed
-    generate_rss_feed(repo, me)
+    generate_rss_feed(repo, my_issues, now)
 
     logger.info("README.md 和 feed.xml 更新完成")
     logger.info("=" * 50)
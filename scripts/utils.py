@@ -10,9 +10,12 @@ import sys
 import json
 import logging
 import platform
+from functools import lru_cache
+from operator import attrgetter
 from datetime import datetime, timedelta, timezone
 
 import github
+from urllib3.util.retry import Retry
 
 # 配置日志
 logging.basicConfig(
@@ -20,21 +23,160 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s',
     stream=sys.stdout
 )
+# 日志格式不含线程/进程信息，关闭后每条日志不再采集线程名与进程号
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logger = logging.getLogger(__name__)
 
 # 常量定义
-TOP_ISSUES_LABELS = ["Top", "置顶"]
-TODO_ISSUES_LABELS = ["TODO", "待办"]
-IGNORE_LABELS = TOP_ISSUES_LABELS + TODO_ISSUES_LABELS + ["bug", "enhancement"]
+# 标签集合只用于成员判断，使用 frozenset 做 O(1) 查找
+TOP_ISSUES_LABELS = frozenset(["Top", "置顶"])
+TODO_ISSUES_LABELS = frozenset(["TODO", "待办"])
+IGNORE_LABELS = TOP_ISSUES_LABELS | TODO_ISSUES_LABELS | frozenset(["bug", "enhancement"])
 POSTS_DIR = "posts"
 POSTS_INDEX_FILE = "posts/index.json"
 POSTS_EXPORT_FILE = "posts_export.json"
 RECENT_ISSUE_LIMIT = 20
 METADATA_FILE = ".temp_metadata.json"
+# REST 分页每页条数（PyGithub 默认 30，最大 100），减少回退路径上的分页请求
+GITHUB_PER_PAGE = 100
+# 与 GitHub 的 HTTP 连接池大小，需不小于并发拉取评论/生成文章的线程数，保证连接复用
+HTTP_POOL_SIZE = 16
+# 请求遇到限流/服务端错误时的最大重试次数，间隔按指数退避（1s, 2s, 4s ...）
+GITHUB_MAX_RETRIES = 5
+GITHUB_RETRY_BACKOFF = 1
+# 无条件重试的状态码：429 为限流，5xx 为服务端临时错误
+# 403 也可能是权限/认证失败，只在带 Retry-After（二级限流）时重试，见 _RateLimitRetry
+GITHUB_RETRY_STATUS = (429, 500, 502, 503, 504)
 
 # 北京时区
 BEIJING_TZ = timezone(timedelta(hours=8))
 
+# 图片统计正则（Markdown ![]() 和 HTML <img>），模块加载时编译一次
+MD_IMAGE_RE = re.compile(r'!\[[^\]]*\]\([^)]+\)')
+HTML_IMAGE_RE = re.compile(r'<img[^>]+src=["\'][^"\']+["\']', re.IGNORECASE)
+
+# 去除 markdown 语法的正则规则（按顺序执行），模块加载时编译一次
+_MARKDOWN_CLEAN_RULES = (
+    # 移除 HTML 注释
+    (re.compile(r'<!--.*?-->', re.DOTALL), ''),
+    # 移除代码块
+    (re.compile(r'```.*?```', re.DOTALL), ''),
+    (re.compile(r'~~~.*?~~~', re.DOTALL), ''),
+    # 移除行内代码
+    (re.compile(r'`[^`]*`'), ''),
+    # 移除图片（在移除链接之前处理）
+    (MD_IMAGE_RE, ''),
+    # 移除链接语法，保留链接文本 [text](url) -> text
+    (re.compile(r'\[([^\]]+)\]\([^)]+\)'), r'\1'),
+    # 移除 HTML 标签
+    (re.compile(r'<[^>]+>'), ''),
+    # 移除 URL（裸链接）
+    (re.compile(r'https?://\S+'), ''),
+    # 移除表格分隔线
+    (re.compile(r'^\s*\|?[-:| ]+\|?\s*$', re.MULTILINE), ''),
+    # 移除引用标记、列表标记
+    (re.compile(r'^\s*[>\-*+]\s+', re.MULTILINE), ''),
+    # 移除标题标记
+    (re.compile(r'^#{1,6}\s+', re.MULTILINE), ''),
+    # 移除水平分隔线
+    (re.compile(r'^[-*_]{3,}\s*$', re.MULTILINE), ''),
+    # 移除加粗/斜体标记
+    (re.compile(r'\*\*([^*]+)\*\*'), r'\1'),
+    (re.compile(r'__([^_]+)__'), r'\1'),
+    (re.compile(r'\*([^*]+)\*'), r'\1'),
+    (re.compile(r'_([^_]+)_'), r'\1'),
+    # 移除删除线
+    (re.compile(r'~~([^~]+)~~'), r'\1'),
+)
+_ESCAPE_RE = re.compile(r'\\(.)')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+# 字数统计正则：中文字符、英文单词、数字
+_CHINESE_CHAR_RE = re.compile(r'[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]')
+_ENGLISH_WORD_RE = re.compile(r'\b[a-zA-Z]+\b')
+_NUMBER_RE = re.compile(r'\b\d+\b')
+
+# issue 与 PR 节点共用的字段
+# 每篇取前 20 个标签（单篇文章的标签远少于此）；评论取第一页，超出部分由 get_comments() 续页
+_ISSUE_NODE_FIELDS = """
+        number title url body state createdAt updatedAt
+        author { login }
+        labels(first: 20) { nodes { name } }
+        comments(first: 100) {
+          totalCount
+          pageInfo { hasNextPage endCursor }
+          nodes { body createdAt author { login } }
+        }
+"""
+
+# GraphQL 批量查询：一次往返取回 issue（含标签、评论）、PR 与仓库标签
+# labels / pullRequests 只在第一页请求，超过 100 个时由各自的续页查询翻完，后续分页只翻 issues
+# issues 按作者在服务端过滤；pullRequests 不过滤（CHANGELOG 需要第三方 PR）
+# $states / $prStates 为 null 时不按状态过滤，只需要 open 的调用方传 [OPEN]
+REPO_DATA_QUERY = """
+query($owner: String!, $name: String!, $cursor: String, $firstPage: Boolean!, $creator: String,
+      $states: [IssueState!], $prStates: [PullRequestState!]) {
+  repository(owner: $owner, name: $name) {
+    labels(first: 100) @include(if: $firstPage) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name description }
+    }
+    pullRequests(first: 100, states: $prStates, orderBy: {field: UPDATED_AT, direction: DESC}) @include(if: $firstPage) {
+      pageInfo { hasNextPage endCursor }
+      nodes { %s }
+    }
+    issues(first: 100, after: $cursor, states: $states, filterBy: {createdBy: $creator},
+           orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { %s }
+    }
+  }
+}
+""" % (_ISSUE_NODE_FIELDS, _ISSUE_NODE_FIELDS)
+
+# 仓库标签续页查询
+REPO_LABELS_QUERY = """
+query($owner: String!, $name: String!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    labels(first: 100, after: $cursor) {
+      pageInfo { hasNextPage endCursor }
+      nodes { name description }
+    }
+  }
+}
+"""
+
+# PR 续页查询
+REPO_PULL_REQUESTS_QUERY = """
+query($owner: String!, $name: String!, $cursor: String, $prStates: [PullRequestState!]) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(first: 100, after: $cursor, states: $prStates, orderBy: {field: UPDATED_AT, direction: DESC}) {
+      pageInfo { hasNextPage endCursor }
+      nodes { %s }
+    }
+  }
+}
+""" % _ISSUE_NODE_FIELDS
+
+# 单个 issue/PR 的评论续页查询：评论超过 100 条时按游标继续翻页
+ISSUE_COMMENTS_QUERY = """
+query($owner: String!, $name: String!, $number: Int!, $cursor: String) {
+  repository(owner: $owner, name: $name) {
+    issueOrPullRequest(number: $number) {
+      ... on Issue { comments(first: 100, after: $cursor) { ...CommentPage } }
+      ... on PullRequest { comments(first: 100, after: $cursor) { ...CommentPage } }
+    }
+  }
+}
+
+fragment CommentPage on IssueCommentConnection {
+  pageInfo { hasNextPage endCursor }
+  nodes { body createdAt author { login } }
+}
+"""
+
 
 def log_environment():
     """输出运行环境信息，用于跨环境调试"""
@@ -89,16 +231,45 @@ def is_me(issue_or_comment, me):
         return False
 
 
+class _RateLimitRetry(Retry):
+    """带 Retry-After 头的 403（GitHub 二级限流）按头部给出的时间等待后重试，
+    不带该头的 403（权限不足、token 无效等）直接返回，不做退避重试
+    """
+
+    RETRY_AFTER_STATUS_CODES = Retry.RETRY_AFTER_STATUS_CODES | frozenset([403])
+
+
+def _build_retry():
+    """构造请求重试策略
+    PyGithub 2.x 默认的 GithubRetry 已按限流响应等待重试，返回 None 沿用默认；
+    旧版本默认不重试，使用指数退避的 urllib3 Retry。
+    GraphQL 查询只读，POST 也允许重试；重试耗尽后返回原响应，由 PyGithub 照常抛出异常
+    """
+    if hasattr(github, "GithubRetry"):
+        return None
+    return _RateLimitRetry(
+        total=GITHUB_MAX_RETRIES,
+        backoff_factor=GITHUB_RETRY_BACKOFF,
+        status_forcelist=GITHUB_RETRY_STATUS,
+        allowed_methods=None,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+
+
 def login(token):
     """登录GitHub"""
+    retry = _build_retry()
     try:
         try:
             import github.Auth
             auth = github.Auth.Token(token)
-            return github.Github(auth=auth)
+            if retry is None:
+                return github.Github(auth=auth, per_page=GITHUB_PER_PAGE, pool_size=HTTP_POOL_SIZE)
+            return github.Github(auth=auth, per_page=GITHUB_PER_PAGE, pool_size=HTTP_POOL_SIZE, retry=retry)
         except ImportError:
             logger.warning("使用旧版本的PyGithub认证方法")
-            return github.Github(token)
+            return github.Github(token, per_page=GITHUB_PER_PAGE, retry=retry)
     except Exception as e:
         logger.error(f"登录GitHub失败: {str(e)}")
         raise
@@ -113,20 +284,193 @@ def get_repo(user, repo_name):
         raise
 
 
+def _parse_github_time(value):
+    """解析 GitHub GraphQL 返回的时间字符串（如 2026-06-16T09:48:32Z）为 UTC 时间"""
+    if not value:
+        return None
+    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+
+
+class _GraphQLUser:
+    """GraphQL author 节点，对齐 PyGithub NamedUser 的 login 属性"""
+
+    def __init__(self, node):
+        self.login = (node or {}).get("login")
+
+
+class _GraphQLLabel:
+    """GraphQL 标签节点，对齐 PyGithub Label 的 name/description 属性"""
+
+    def __init__(self, node):
+        self.name = node.get("name") or ""
+        self.description = node.get("description")
+
+
+class _GraphQLComment:
+    """GraphQL 评论节点，对齐 PyGithub IssueComment 的常用属性"""
+
+    def __init__(self, node):
+        self.body = node.get("body")
+        self.created_at = _parse_github_time(node.get("createdAt"))
+        self.user = _GraphQLUser(node.get("author"))
+
+
+class _GraphQLIssue:
+    """GraphQL issue/PR 节点，对齐 PyGithub Issue 的常用属性
+    评论随查询一并返回；超过单页上限时 get_comments() 用 GraphQL 按游标续页，
+    续页失败再回退到 REST 拉取完整列表
+    """
+
+    def __init__(self, node, repo, is_pull=False):
+        self.number = node.get("number")
+        self.title = node.get("title") or ""
+        self.body = node.get("body")
+        # GraphQL 的 MERGED 在 REST 中同样表现为 closed
+        self.state = "open" if node.get("state") == "OPEN" else "closed"
+        self.html_url = node.get("url")
+        self.created_at = _parse_github_time(node.get("createdAt"))
+        self.updated_at = _parse_github_time(node.get("updatedAt"))
+        self.user = _GraphQLUser(node.get("author"))
+        self.labels = [_GraphQLLabel(l) for l in (node.get("labels") or {}).get("nodes") or []]
+        self.pull_request = self.html_url if is_pull else None
+
+        comments = node.get("comments") or {}
+        self._comments = [_GraphQLComment(c) for c in comments.get("nodes") or []]
+        self.comments = comments.get("totalCount", len(self._comments))
+        self._comments_cursor = _next_cursor(comments)
+        self._repo = repo
+
+    def get_comments(self):
+        if self._comments_cursor:
+            logger.info(f"issue #{self.number} 评论数 {self.comments} 超过单页上限，继续分页拉取")
+            try:
+                self._fetch_remaining_comments()
+            except Exception as e:
+                logger.warning(f"issue #{self.number} GraphQL 评论分页失败，回退到 REST: {str(e)}")
+                self._comments = list(self._repo.get_issue(self.number).get_comments())
+                self._comments_cursor = None
+        return self._comments
+
+    def _fetch_remaining_comments(self):
+        """从上次的游标开始翻完剩余评论，全部成功后才替换已有列表"""
+        owner, name = self._repo.full_name.split("/", 1)
+        comments = list(self._comments)
+        cursor = self._comments_cursor
+        while cursor:
+            page = _graphql_query(self._repo, ISSUE_COMMENTS_QUERY, {
+                "owner": owner, "name": name, "number": self.number, "cursor": cursor
+            })["repository"]["issueOrPullRequest"]["comments"]
+            comments.extend(_GraphQLComment(c) for c in page["nodes"])
+            cursor = _next_cursor(page)
+        self._comments = comments
+        self._comments_cursor = None
+
+
+def _next_cursor(connection):
+    """GraphQL 连接还有下一页时返回游标，否则返回 None"""
+    page_info = (connection or {}).get("pageInfo") or {}
+    return page_info.get("endCursor") if page_info.get("hasNextPage") else None
+
+
+def _fetch_remaining_nodes(repo, query, key, cursor, variables=None):
+    """从 cursor 开始翻完仓库下的某个连接（labels / pullRequests），返回剩余节点
+    variables 为续页查询额外需要的变量（如 PR 的状态过滤）
+    """
+    owner, name = repo.full_name.split("/", 1)
+    nodes = []
+    while cursor:
+        page = _graphql_query(repo, query, dict(
+            variables or {}, owner=owner, name=name, cursor=cursor))["repository"][key]
+        nodes.extend(page["nodes"])
+        cursor = _next_cursor(page)
+    return nodes
+
+
+def _graphql_query(repo, query, variables):
+    """通过 PyGithub 的 requester 发送 GraphQL 请求（复用其认证与连接）"""
+    _, data = repo._requester.requestJsonAndCheck(
+        "POST", "/graphql", input={"query": query, "variables": variables}
+    )
+    if data.get("errors"):
+        raise RuntimeError(f"GraphQL 查询返回错误: {data['errors']}")
+    return data["data"]
+
+
+def _fetch_repo_data_graphql(repo, creator=None, state="all"):
+    """用 GraphQL 分页拉取 issue（含评论）、PR（含标签、评论）和仓库标签
+    指定 creator 时只拉取该用户创建的 issue；state 为 "open" 时 issue 与 PR 都只拉取未关闭的
+    """
+    owner, name = repo.full_name.split("/", 1)
+    # 与 REST 的 state 参数对应：all 不过滤
+    states = None if state == "all" else [state.upper()]
+    issues, labels = [], []
+    cursor = None
+    while True:
+        data = _graphql_query(repo, REPO_DATA_QUERY, {
+            "owner": owner, "name": name, "cursor": cursor,
+            "firstPage": cursor is None, "creator": creator,
+            "states": states, "prStates": states
+        })["repository"]
+
+        if cursor is None:
+            label_nodes = data["labels"]["nodes"] + _fetch_remaining_nodes(
+                repo, REPO_LABELS_QUERY, "labels", _next_cursor(data["labels"]))
+            pull_nodes = data["pullRequests"]["nodes"] + _fetch_remaining_nodes(
+                repo, REPO_PULL_REQUESTS_QUERY, "pullRequests", _next_cursor(data["pullRequests"]),
+                {"prStates": states})
+            labels = [_GraphQLLabel(n) for n in label_nodes]
+            issues.extend(_GraphQLIssue(n, repo, is_pull=True) for n in pull_nodes)
+
+        page = data["issues"]
+        issues.extend(_GraphQLIssue(n, repo) for n in page["nodes"])
+        cursor = _next_cursor(page)
+        if not cursor:
+            break
+
+    issues.sort(key=attrgetter('updated_at'), reverse=True)
+    logger.info(f"GraphQL 拉取完成: {len(issues)} 个 issue/PR, {len(labels)} 个标签")
+    return issues, labels
+
+
+def fetch_repo_data(repo, me=None, state="all"):
+    """一次性拉取仓库的 issue（含 PR）与标签，供各生成步骤复用
+    优先使用 GraphQL 批量查询，失败时回退到 REST 分页
+    指定 me 时 GraphQL 在服务端只返回自己创建的 issue（PR 不过滤），
+    REST 回退时仍返回全部 issue，由调用方的 is_me 判断过滤
+    state 与 REST 的同名参数一致（"all" / "open"），在服务端过滤 issue 与 PR
+    Returns:
+        (issues, labels)，issues 按 updated_at 倒序
+    """
+    try:
+        return _fetch_repo_data_graphql(repo, creator=me, state=state)
+    except Exception as e:
+        logger.warning(f"GraphQL 批量拉取失败，回退到 REST: {str(e)}")
+        # 由服务端按更新时间倒序返回（issue 与 PR 同一列表），无需本地排序
+        issues = list(repo.get_issues(state=state, sort='updated', direction='desc'))
+        return issues, list(repo.get_labels())
+
+
 def format_time(time_obj):
     """格式化时间为北京时间 (UTC+8)"""
     try:
         if not hasattr(time_obj, 'strftime'):
             return "未知时间"
-        if time_obj.tzinfo is None:
-            time_obj = time_obj.replace(tzinfo=timezone.utc)
-        local_time = time_obj.astimezone(BEIJING_TZ)
-        return local_time.strftime("%Y-%m-%d %H:%M")
+        return _format_beijing_time(time_obj)
     except Exception as e:
         logger.error(f"格式化时间失败: {str(e)}")
         return "时间格式化失败"
 
 
+@lru_cache(maxsize=4096)
+def _format_beijing_time(time_obj):
+    """将时间对象换算为北京时间字符串
+    同一篇文章会出现在置顶/标签/文章列表等多个模块，按时间对象缓存结果避免重复换算时区
+    """
+    if time_obj.tzinfo is None:
+        time_obj = time_obj.replace(tzinfo=timezone.utc)
+    return time_obj.astimezone(BEIJING_TZ).strftime("%Y-%m-%d %H:%M")
+
+
 def _clean_markdown(text):
     """去掉 markdown 语法，返回纯文本（跨平台兼容）"""
     if not text:
@@ -135,51 +479,23 @@ def _clean_markdown(text):
     # 归一化换行符（消除 Windows/Linux 差异）
     text = _normalize_line_endings(text)
 
-    # 移除 HTML 注释
-    text = re.sub(r'<!--.*?-->', '', text, flags=re.DOTALL)
-    # 移除代码块
-    text = re.sub(r'```.*?```', '', text, flags=re.DOTALL)
-    text = re.sub(r'~~~.*?~~~', '', text, flags=re.DOTALL)
-    # 移除行内代码
-    text = re.sub(r'`[^`]*`', '', text)
-    # 移除图片（在移除链接之前处理）
-    text = re.sub(r'!\[[^\]]*\]\([^)]+\)', '', text)
-    # 移除链接语法，保留链接文本 [text](url) -> text
-    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', text)
-    # 移除 HTML 标签
-    text = re.sub(r'<[^>]+>', '', text)
-    # 移除 URL（裸链接）
-    text = re.sub(r'https?://\S+', '', text)
-    # 移除表格分隔线
-    text = re.sub(r'^\s*\|?[-:| ]+\|?\s*$', '', text, flags=re.MULTILINE)
-    # 移除引用标记、列表标记
-    text = re.sub(r'^\s*[>\-*+]\s+', '', text, flags=re.MULTILINE)
-    # 移除标题标记
-    text = re.sub(r'^#{1,6}\s+', '', text, flags=re.MULTILINE)
-    # 移除水平分隔线
-    text = re.sub(r'^[-*_]{3,}\s*$', '', text, flags=re.MULTILINE)
-    # 移除加粗/斜体标记
-    text = re.sub(r'\*\*([^*]+)\*\*', r'\1', text)
-    text = re.sub(r'__([^_]+)__', r'\1', text)
-    text = re.sub(r'\*([^*]+)\*', r'\1', text)
-    text = re.sub(r'_([^_]+)_', r'\1', text)
-    # 移除删除线
-    text = re.sub(r'~~([^~]+)~~', r'\1', text)
-    # 移除表格管道符和多余的空白
-    text = re.sub(r'\|', ' ', text)
+    for pattern, repl in _MARKDOWN_CLEAN_RULES:
+        text = pattern.sub(repl, text)
+    # 移除表格管道符和多余的空白（单个固定字符，无需正则）
+    text = text.replace('|', ' ')
     # 移除反斜杠转义
-    text = re.sub(r'\\(.)', r'\1', text)
+    text = _ESCAPE_RE.sub(r'\1', text)
     # 合并多余的空白
-    return re.sub(r'\s+', ' ', text).strip()
+    return _WHITESPACE_RE.sub(' ', text).strip()
 
 
 def _count_words(clean_text):
     """从纯文本中统计字数：中文单字 + 英文单词 + 数字"""
     if not clean_text:
         return 0
-    chinese_chars = len(re.findall(r'[\u4e00-\u9fff\u3000-\u303f\uff00-\uffef]', clean_text))
-    english_words = len(re.findall(r'\b[a-zA-Z]+\b', clean_text))
-    numbers = len(re.findall(r'\b\d+\b', clean_text))
+    chinese_chars = len(_CHINESE_CHAR_RE.findall(clean_text))
+    english_words = len(_ENGLISH_WORD_RE.findall(clean_text))
+    numbers = len(_NUMBER_RE.findall(clean_text))
     return chinese_chars + english_words + numbers
 
 
@@ -200,8 +516,8 @@ def get_content_image_count(content):
     try:
         if not content:
             return 0
-        md_images = len(re.findall(r'!\[[^\]]*\]\([^)]+\)', content))
-        html_images = len(re.findall(r'<img[^>]+src=["\'][^"\']+["\']', content, re.IGNORECASE))
+        md_images = len(MD_IMAGE_RE.findall(content))
+        html_images = len(HTML_IMAGE_RE.findall(content))
         result = md_images + html_images
         logger.debug(f"[STAT] image_count={result} (md={md_images}, html={html_images})")
         return result
@@ -224,8 +540,8 @@ def get_issue_image_count(issue):
     try:
         if not issue.body:
             return 0
-        md_images = len(re.findall(r'!\[[^\]]*\]\([^)]+\)', issue.body))
-        html_images = len(re.findall(r'<img[^>]+src=["\'][^"\']+["\']', issue.body, re.IGNORECASE))
+        md_images = len(MD_IMAGE_RE.findall(issue.body))
+        html_images = len(HTML_IMAGE_RE.findall(issue.body))
         return md_images + html_images
     except Exception as e:
         logger.error(f"获取issue图片数量失败 #{issue.number}: {str(e)}")
@@ -273,11 +589,11 @@ def should_include_issue(issue, metadata=None):
 
 def load_metadata():
     """加载元数据文件，返回 issue_number -> metadata 的字典"""
-    if not os.path.exists(METADATA_FILE):
-        return {}
     try:
         with open(METADATA_FILE, "r", encoding="utf-8") as f:
             return json.load(f)
+    except FileNotFoundError:
+        return {}
     except Exception as e:
         logger.warning(f"加载元数据失败: {str(e)}")
         return {}
@@ -292,6 +608,37 @@ def save_metadata(metadata):
         logger.error(f"保存元数据失败: {str(e)}")
 
 
+def write_file_atomic(path, content):
+    """先写临时文件再 os.replace 原子替换，进程中途退出也不会留下写了一半的文件"""
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def write_if_changed(path, content):
+    """内容与现有文件一致时跳过写入，避免无变化时改动文件触发工作流提交
+    Returns:
+        True 表示已写入，False 表示内容未变化
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            if f.read() == content:
+                logger.info(f"{path} 内容未变化，跳过写入")
+                return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+    write_file_atomic(path, content)
+    return True
+
+
 def count_from_md_file(issue_number, issue_title):
     """从已生成的 posts/ 目录下的 .md 文件中直接统计字数和图片数
     当元数据不可用时作为回退方案，确保统计结果与 generate_posts 一致
@@ -303,17 +650,17 @@ def count_from_md_file(issue_number, issue_title):
     safe_title = sanitize_filename(issue_title)
     md_path = None
 
-    # 遍历 posts/ 目录查找匹配的 .md 文件
-    if os.path.isdir(POSTS_DIR):
-        for root, dirs, files in os.walk(POSTS_DIR):
-            for f in files:
-                if f == f"{safe_title}.md":
-                    md_path = os.path.join(root, f)
-                    break
-            if md_path:
+    # 遍历 posts/ 目录查找匹配的 .md 文件（目录不存在时 os.walk 直接返回空）
+    for root, dirs, files in os.walk(POSTS_DIR):
+        for f in files:
+            if f == f"{safe_title}.md":
+                md_path = os.path.join(root, f)
                 break
+        if md_path:
+            break
 
-    if not md_path or not os.path.exists(md_path):
+    # md_path 来自 os.walk 的目录列表，找到即存在，无需再 exists 检查
+    if not md_path:
         logger.debug(f"[FALLBACK] issue #{issue_number} 的 .md 文件不存在: posts/**/ {safe_title}.md")
         return None, None
 